@@ -1,2 +1 @@
 import chessy.game
-import
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Attack tables and Numba-compiled kernels for attack detection on bitboards.
+
+Squares are indexed as defined in `chessy.board_representation.Move`. All tables are
+module-level `numpy.uint64` arrays, which Numba embeds as constants in the compiled kernels;
+the kernels are cached on disk (`cache=True`), so they are only compiled on the very first import.
+"""
+
+# Standard library
+from __future__ import annotations
+
+# 3rd party
+import numpy as np
+from numba import njit
+
+# Self
+from .consts import KNIGHT, MOVE_DIRECTIONS, DIRECTIONS
+from .magics import (
+    ROOK_MASKS, ROOK_MAGICS, ROOK_SHIFTS, ROOK_OFFSETS, ROOK_ATTACKS,
+    BISHOP_MASKS, BISHOP_MAGICS, BISHOP_SHIFTS, BISHOP_OFFSETS, BISHOP_ATTACKS,
+)
+
+
+def leaper_attacks(sq: int, deltas: list) -> int:
+    """
+    Bitboard of the squares attacked from a given square by a piece that jumps
+    by a fixed set of vectors (i.e. knight, king and pawn). Only used for generating
+    the attack tables below.
+    """
+    r0, c0 = divmod(sq, 8)
+    attacks = 0
+    for dr, dc in deltas:
+        r, c = r0 + dr, c0 + dc
+        if 0 <= r < 8 and 0 <= c < 8:
+            attacks |= 1 << (r * 8 + c)
+    return attacks
+
+
+# Bitboards of the squares attacked by a knight/king/pawn, indexed by the piece's square
+KNIGHT_ATTACKS = np.array(
+    [leaper_attacks(sq, MOVE_DIRECTIONS[KNIGHT].tolist()) for sq in range(64)], dtype=np.uint64
+)
+KING_ATTACKS = np.array(
+    [leaper_attacks(sq, DIRECTIONS.tolist()) for sq in range(64)], dtype=np.uint64
+)
+PAWN_ATTACKS_W = np.array(
+    [leaper_attacks(sq, [[1, -1], [1, 1]]) for sq in range(64)], dtype=np.uint64
+)
+PAWN_ATTACKS_B = np.array(
+    [leaper_attacks(sq, [[-1, -1], [-1, 1]]) for sq in range(64)], dtype=np.uint64
+)
+
+
+# Numba counterparts of `magics.rook_attacks`/`magics.bishop_attacks`, working on
+# the `numpy.uint64` tables for use inside the jitted kernels below.
+@njit(cache=True, boundscheck=False)
+def _rook_attacks_nb(sq: int, occupancy: np.uint64) -> np.uint64:
+    idx = ((occupancy & ROOK_MASKS[sq]) * ROOK_MAGICS[sq]) >> ROOK_SHIFTS[sq]
+    return ROOK_ATTACKS[ROOK_OFFSETS[sq] + idx]
+
+
+@njit(cache=True, boundscheck=False)
+def _bishop_attacks_nb(sq: int, occupancy: np.uint64) -> np.uint64:
+    idx = ((occupancy & BISHOP_MASKS[sq]) * BISHOP_MAGICS[sq]) >> BISHOP_SHIFTS[sq]
+    return BISHOP_ATTACKS[BISHOP_OFFSETS[sq] + idx]
+
+
+@njit(cache=True, boundscheck=False)
+def is_square_attacked(occupancy: np.uint64, enemy_pieces: np.ndarray, sq: int, p: int) -> bool:
+    """
+    Whether a given square is attacked by any piece of a given player.
+
+    Parameters
+    ----------
+    occupancy : numpy.uint64
+        Bitboard of all occupied squares.
+    enemy_pieces : numpy.ndarray(shape=(6, ), dtype=numpy.uint64)
+        Bitboards of the attacking player's pawns, knights, bishops, rooks, queens and king.
+    sq : int
+        Index of the square.
+    p : int
+        Attacking player; +1 for white and -1 for black.
+
+    Returns
+    -------
+    bool
+    """
+    # Squares from which a pawn of `p` attacks `sq` are those that a pawn of
+    # the other player, standing on `sq`, would attack.
+    pawn_attacks = PAWN_ATTACKS_B if p == 1 else PAWN_ATTACKS_W
+    queens = enemy_pieces[4]
+    return (
+        (KNIGHT_ATTACKS[sq] & enemy_pieces[1]) != 0
+        or (KING_ATTACKS[sq] & enemy_pieces[5]) != 0
+        or (pawn_attacks[sq] & enemy_pieces[0]) != 0
+        or (_rook_attacks_nb(sq, occupancy) & (enemy_pieces[3] | queens)) != 0
+        or (_bishop_attacks_nb(sq, occupancy) & (enemy_pieces[2] | queens)) != 0
+    )
+
+
+@njit(cache=True, boundscheck=False)
+def moves_result_in_check(
+    pieces: np.ndarray, sq_king: int, p: int, sq0s: np.ndarray, sq1s: np.ndarray, ps: np.ndarray
+) -> np.ndarray:
+    """
+    For a number of moves of a given player, whether each move leaves the player's king
+    under attack.
+
+    Parameters
+    ----------
+    pieces : numpy.ndarray(shape=(12, ), dtype=numpy.uint64)
+        Piece bitboards of the current position, ordered as in `chessy.judges.bitboard`.
+    sq_king : int
+        Index of the square of the moving player's king.
+    p : int
+        Moving player; +1 for white and -1 for black.
+    sq0s : numpy.ndarray(shape=(n, ), dtype=numpy.int64)
+        Indices of the start-squares.
+    sq1s : numpy.ndarray(shape=(n, ), dtype=numpy.int64)
+        Indices of the end-squares.
+    ps : numpy.ndarray(shape=(n, ), dtype=numpy.int64)
+        Piece-IDs of the moving pieces.
+
+    Returns
+    -------
+    numpy.ndarray(shape=(n, ), dtype=numpy.bool_)
+    """
+    opp_idx = 6 if p == 1 else 0
+    occupancy = np.uint64(0)
+    for bb in pieces:
+        occupancy |= bb
+    enemy_pieces = np.empty(6, dtype=np.uint64)
+    results = np.empty(sq0s.size, dtype=np.bool_)
+    for i in range(sq0s.size):
+        sq0, sq1, piece_type = sq0s[i], sq1s[i], abs(ps[i])
+        bb_sq0, bb_sq1 = np.uint64(1) << np.uint64(sq0), np.uint64(1) << np.uint64(sq1)
+        # Move the piece, and remove any captured piece
+        occupancy_after = (occupancy & ~bb_sq0) | bb_sq1
+        for j in range(6):
+            enemy_pieces[j] = pieces[opp_idx + j] & ~bb_sq1
+        if piece_type == 1 and sq0 % 8 != sq1 % 8 and (occupancy & bb_sq1) == 0:
+            # En passant capture; remove the captured pawn behind the end-square
+            bb_captured = np.uint64(1) << np.uint64(sq1 - 8 * p)
+            enemy_pieces[0] &= ~bb_captured
+            occupancy_after &= ~bb_captured
+        results[i] = is_square_attacked(
+            occupancy_after, enemy_pieces, sq1 if piece_type == 6 else sq_king, -p
+        )
+    return results
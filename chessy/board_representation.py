@@ -4,11 +4,22 @@ This module contains the data structures and conventions used in the whole progr
 
 # Standard library
 from __future__ import annotations
-from typing import NamedTuple, Optional
+from typing import Iterator, NamedTuple, Optional, Sequence, Union
 
 # 3rd party
 import numpy as np
 
+# Self
+from .consts import WHITE, CASTLING_RIGHTS_DEFAULT
+
+
+# Board of the starting position of a standard game, built once at import (read-only)
+STARTING_BOARD = np.zeros(shape=(8, 8), dtype=np.int8)  # Initialize an all-zero 8x8 array
+STARTING_BOARD[(1, -2), :] = [[1], [-1]]  # Set white and black pawns on rows 2 and 7
+STARTING_BOARD[0, :] = [4, 2, 3, 5, 6, 3, 2, 4]  # Set white's main pieces on row 1
+STARTING_BOARD[-1, :] = -STARTING_BOARD[0]  # Set black's main pieces on row 8
+STARTING_BOARD.setflags(write=False)
+
 
 class BoardState(NamedTuple):
     """
@@ -25,116 +36,285 @@ class BoardState(NamedTuple):
         0 = empty, 1 = pawn, 2 = knight, 3 = bishop, 4 = rook, 5 = queen, 6 = king
         White pieces are denoted with positive integers, while black pieces have the
         same magnitude but with a negative sign (e.g. +6 = white king, –6 = black king).
-    castling_rights : dict[numpy.int8, numpy.ndarray(shape=(2,), dtype=numpy.bool_)]
-        A dictionary representing the castling availabilities, i.e. whether either player is
-        permanently disqualified to castle, for white (key: 1) and black (key: -1).
-        Each value is a 1-dimensional array, corresponding to queenside and kingside castles, in
-        that order (i.e. element 0: queenside, 1: kingside). Data is boolean:
-        True (castling allowed) or False (not allowed).
-    player : numpy.int8
+    castling_rights : int
+        The castling availabilities, i.e. whether either player is permanently disqualified
+        to castle, as bit-flags (see `consts.CR_WK`, `CR_WQ`, `CR_BK` and `CR_BQ`):
+        bit 0: white kingside, 1: white queenside, 2: black kingside, 3: black queenside.
+        A set bit means castling is allowed; e.g. `bool(castling_rights & CR_WK)` is True
+        if white can still castle kingside.
+    player : int
         Current player to move; +1 is white and -1 is black.
-    enpassant_file : numpy.int8
+    enpassant_file : int
         The file (column) index (from 0 to 7), in which an en passant capture is allowed
         for the current player in the current move. Defaults to -1 if no en passant allowed.
-    fifty_move_count : numpy.int8
+    fifty_move_count : int
         Number of plies (half-moves) since the last capture or pawn advance, used for
         the fifty-move-draw rule; if the number reaches 100, the game ends in a draw.
-    ply_count : numpy.int16
+    ply_count : int
         The number of plies (half-moves) from the beginning of the game. Starts at 0.
+    zobrist : Optional[int]
+        Zobrist hash of the position (see `chessy.zobrist`), i.e. of the board, castling rights,
+        current player and en passant file. It is only filled in by `Judge.current_state`, and
+        None for all other states (e.g. those of `create_new_game` and `fen.to_boardstate`).
+        Judges never read it, but compute the hash from the other fields when instantiated,
+        so that a state whose board has been modified remains valid.
     """
 
     board: np.ndarray
-    castling_rights: dict[np.int8, dict[np.int8, bool]]
-    player: np.int8
-    enpassant_file: np.int8
-    fifty_move_count: np.int8
-    ply_count: np.int16
+    castling_rights: int
+    player: int
+    enpassant_file: int
+    fifty_move_count: int
+    ply_count: int
     is_checkmate: Optional[bool] = None
     is_draw: Optional[bool] = None
+    zobrist: Optional[int] = None
 
     @classmethod
     def create_new_game(cls) -> BoardState:
         """
         Instantiate a new Chessboard in the starting position of a standard game.
+        The board is a (writable) copy of the precomputed `STARTING_BOARD`, which callers may
+        modify; the Zobrist hash is thus left unset, to be computed by the judge.
 
         Returns
         -------
         BoardState
         """
-        # Set up board
-        board = np.zeros(shape=(8, 8), dtype=np.int8)  # Initialize an all-zero 8x8 array
-        board[(1, -2), :] = [[1], [-1]]  # Set white and black pawns on rows 2 and 7
-        board[0, :] = [4, 2, 3, 5, 6, 3, 2, 4]  # Set white's main pieces on row 1
-        board[-1, :] = -board[0]  # Set black's main pieces on row 8
         # Set instance attributes describing the game state to their initial values
         return cls(
-            board=board,
-            castling_rights={
-                np.int8(1): {np.int8(-2): True, np.int8(2): True},
-                np.int8(-1): {np.int8(-2): True, np.int8(2): True}
-            },
-            player=np.int8(1),
-            enpassant_file=np.int8(-1),
-            fifty_move_count=np.int8(0),
-            ply_count=np.int16(0),
+            board=STARTING_BOARD.copy(),
+            castling_rights=CASTLING_RIGHTS_DEFAULT,
+            player=WHITE,
+            enpassant_file=-1,
+            fifty_move_count=0,
+            ply_count=0,
         )
 
 
-class Move(NamedTuple):
+class Move(int):
     """
     A data structure representing a move in the game.
 
+    A move is packed into a single integer, so that comparing and hashing moves are
+    plain integer operations:
+    bits 0–5: index of the start square, 6–11: index of the end square,
+    12–15: piece-ID of the moving piece, 16–19: piece-ID of the promoted piece,
+    where square indices are `rank index * 8 + file index` (e.g. 0 = a1, 8 = a2, 63 = h8),
+    and piece-IDs are stored as 4-bit two's complement integers.
+    A move is instantiated from its components, i.e. `Move(s0, s1, p, pp=0)`, where:
+
     s0 : numpy.ndarray[shape=(2, ), dtype=numpy.int8]
         Row and column index of the start square (both from 0 to 7), respectively.
         For example, [1, 0] is the square 2a.
     s1 : numpy.ndarray[shape=(2, ), dtype=numpy.int8]
         Row and column index of the end square (both from 0 to 7), respectively.
-    p : numpy.int8
+    p : int
         Piece-ID of the moving piece:
         1 = pawn, 2 = knight, 3 = bishop, 4 = rook, 5 = queen, 6 = king
         White pieces are denoted with positive integers, while black pieces have the
         same magnitude but with a negative sign (e.g. +6 = white king, –6 = black king).
-    pp : numpu.int8
+    pp : int
         Piece-ID of the promoted piece, if the move leads to a promotion, otherwise 0.
     """
 
-    s0: np.ndarray
-    s1: np.ndarray
-    p: np.int8
-    pp: np.int8 = 0
-
-    def __eq__(self, other):
-        return (
-            np.all(self.s0 == other.s0)
-            and np.all(self.s1 == other.s1)
-            and self.p == other.p
-            and self.pp == other.pp
+    __slots__ = ()
+
+    def __new__(cls, s0: Sequence[int], s1: Sequence[int], p: int, pp: int = 0) -> Move:
+        r0, f0, r1, f1 = int(s0[0]), int(s0[1]), int(s1[0]), int(s1[1])
+        if not (0 <= r0 < 8 and 0 <= f0 < 8 and 0 <= r1 < 8 and 0 <= f1 < 8):
+            raise ValueError(f"Move squares must lie inside the board; got {s0} and {s1}.")
+        return int.__new__(cls, pack_move(sq0=r0 * 8 + f0, sq1=r1 * 8 + f1, p=int(p), pp=int(pp)))
+
+    @classmethod
+    def from_packed(cls, packed: int) -> Move:
+        """
+        Instantiate a move from its packed integer representation.
+        """
+        return int.__new__(cls, packed)
+
+    @property
+    def sq0(self) -> int:
+        """
+        Index of the start square.
+        """
+        return self & 0x3F
+
+    @property
+    def sq1(self) -> int:
+        """
+        Index of the end square.
+        """
+        return self >> 6 & 0x3F
+
+    @property
+    def s0(self) -> np.ndarray:
+        """
+        Row and column index of the start square.
+        """
+        return np.array(divmod(self.sq0, 8), dtype=np.int8)
+
+    @property
+    def s1(self) -> np.ndarray:
+        """
+        Row and column index of the end square.
+        """
+        return np.array(divmod(self.sq1, 8), dtype=np.int8)
+
+    @property
+    def p(self) -> int:
+        """
+        Piece-ID of the moving piece.
+        """
+        return ((self >> 12 & 0xF) ^ 8) - 8
+
+    @property
+    def pp(self) -> int:
+        """
+        Piece-ID of the promoted piece, or 0.
+        """
+        return ((self >> 16 & 0xF) ^ 8) - 8
+
+    def __reduce__(self):
+        # `__new__` expects the move's components, so copying and pickling go through
+        # the packed representation instead.
+        return Move.from_packed, (int(self), )
+
+    def __repr__(self) -> str:
+        return f"Move(s0={self.s0.tolist()}, s1={self.s1.tolist()}, p={self.p}, pp={self.pp})"
+
+
+def pack_move(
+    sq0: Union[int, np.ndarray],
+    sq1: Union[int, np.ndarray],
+    p: Union[int, np.ndarray],
+    pp: Union[int, np.ndarray] = 0,
+) -> Union[int, np.ndarray]:
+    """
+    Pack the components of one or several moves into integers, as described in `Move`.
+    Array arguments must have a signed integer dtype of at least 32 bits.
+    """
+    return sq0 | sq1 << 6 | (p & 0xF) << 12 | (pp & 0xF) << 16
+
+
+class Moves:
+    """
+    A data structure representing a number of moves, e.g. all valid moves in a position,
+    stored as arrays of the same length n (one element per move).
+
+    s0s : numpy.ndarray[shape=(n, 2), dtype=numpy.int8]
+        Row and column index of the start square of each move.
+    s1s : numpy.ndarray[shape=(n, 2), dtype=numpy.int8]
+        Row and column index of the end square of each move.
+    ps : numpy.ndarray[shape=(n, ), dtype=numpy.int8]
+        Piece-ID of the moving piece of each move.
+    pps : numpy.ndarray[shape=(n, ), dtype=numpy.int8]
+        Piece-ID of the promoted piece of each move, or 0 when the move is not a promotion.
+    packed : numpy.ndarray[shape=(n, ), dtype=numpy.int32]
+        Packed integer representation of each move (see `Move`).
+        When not given, it is computed from the other arrays.
+    """
+
+    __slots__ = ("s0s", "s1s", "ps", "pps", "packed")
+
+    def __init__(
+        self,
+        s0s: np.ndarray,
+        s1s: np.ndarray,
+        ps: np.ndarray,
+        pps: np.ndarray,
+        packed: Optional[np.ndarray] = None,
+    ):
+        self.s0s: np.ndarray = s0s
+        self.s1s: np.ndarray = s1s
+        self.ps: np.ndarray = ps
+        self.pps: np.ndarray = pps
+        self.packed: np.ndarray = packed if packed is not None else pack_move(
+            sq0=s0s[:, 0].astype(np.int32) * 8 + s0s[:, 1],
+            sq1=s1s[:, 0].astype(np.int32) * 8 + s1s[:, 1],
+            p=ps.astype(np.int32),
+            pp=pps.astype(np.int32),
         )
+        return
 
+    @classmethod
+    def empty(cls) -> Moves:
+        """
+        Instantiate an empty set of moves, e.g. for a position where the game is over.
+        """
+        empty_squares = np.empty(shape=(0, 2), dtype=np.int8)
+        empty_pieces = np.empty(shape=(0, ), dtype=np.int8)
+        return cls(s0s=empty_squares, s1s=empty_squares, ps=empty_pieces, pps=empty_pieces)
+
+    def copy(self) -> Moves:
+        return Moves(
+            s0s=self.s0s.copy(),
+            s1s=self.s1s.copy(),
+            ps=self.ps.copy(),
+            pps=self.pps.copy(),
+            packed=self.packed.copy(),
+        )
+
+    def __len__(self) -> int:
+        return self.packed.size
 
-class Moves(NamedTuple):
+    def __iter__(self) -> Iterator[Move]:
+        """
+        Iterate over the moves. The packed representations are converted to a list up front;
+        only the wrapping of each one in a `Move` happens lazily.
+        """
+        return map(Move.from_packed, self.packed.tolist())
 
-    s0s: np.ndarray
-    s1s: np.ndarray
-    ps: np.ndarray
-    pps: np.ndarray
+    def __getitem__(self, index: Union[int, slice]) -> Union[Move, Moves]:
+        """
+        Get a single move as a `Move` when indexed by an integer,
+        or a subset of the moves as a new `Moves` when indexed by a slice.
+        """
+        if isinstance(index, slice):
+            return Moves(
+                s0s=self.s0s[index],
+                s1s=self.s1s[index],
+                ps=self.ps[index],
+                pps=self.pps[index],
+                packed=self.packed[index],
+            )
+        if not isinstance(index, (int, np.integer)):
+            raise TypeError(
+                f"Moves indices must be integers or slices; got {type(index).__name__}."
+            )
+        return Move.from_packed(int(self.packed[index]))
 
-    def to_move_list(self):
-        return [
-            Move(s0, s1, p, pp) for s0, s1, p, pp in zip(self.s0s, self.s1s, self.ps, self.pps)
-        ]
+    def to_move_list(self) -> list[Move]:
+        return list(self)
+
+    def to_feature_planes(self) -> np.ndarray:
+        """
+        Encode the moves as stacks of boolean 8x8 planes, e.g. as features for neural networks.
+
+        Each move is encoded as 12 planes, one for each colored piece type (white pawn, knight,
+        bishop, rook, queen and king, followed by the same for black). In each stack, the start
+        square is set in the plane of the moving piece, and the end square is set in the plane
+        of the piece standing there after the move (i.e. the promoted piece for promotions).
+
+        Returns
+        -------
+        numpy.ndarray[shape=(n, 12, 8, 8), dtype=numpy.bool_]
+            Axes 2 and 3 correspond to ranks and files, as in `BoardState.board`.
+        """
+        packed = self.packed
+        ps_end = np.where(self.pps != 0, self.pps, self.ps)
+        idx_moves = np.arange(packed.size)
+        planes = np.zeros(shape=(packed.size, 12, 64), dtype=np.bool_)
+        planes[idx_moves, np.where(self.ps > 0, self.ps - 1, 5 - self.ps), packed & 0x3F] = True
+        planes[idx_moves, np.where(ps_end > 0, ps_end - 1, 5 - ps_end), packed >> 6 & 0x3F] = True
+        return planes.reshape(-1, 12, 8, 8)
 
     def has_move(self, move: Move):
-        has_s0 = np.all(self.s0s == move.s0, axis=1)
-        has_s1 = np.all(self.s1s == move.s1, axis=1)
-        has_p = self.ps == move.p
-        has_pps = self.pps == move.pp
-        has_all = has_s0 & has_s1 & has_p & has_pps
-        return np.any(has_all)
+        return bool(np.any(self.packed == move))
 
     @property
     def is_empty(self):
-        return self.s0s.size == 0
+        return self.packed.size == 0
 
 
 class Color(NamedTuple):
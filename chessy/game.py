@@ -1,7 +1,7 @@
 
 import time
-from chessy.board_representation import BoardState, Player, Move
-from chessy.judges.square_list import ArrayJudge
+from chessy.board_representation import BoardState, Move
+from chessy.judges.bitboard import BitboardJudge
 from chessy.judges.abc import IllegalMoveError, GameOverError
 
 class GameError(Exception):
@@ -10,6 +10,18 @@ class GameError(Exception):
 
 class Game:
 
+    __slots__ = (
+        "is_clocked_white",
+        "is_clocked_black",
+        "_timer_white",
+        "_timer_black",
+        "_timer_curr_player_curr_move",
+        "_timer_global",
+        "judge",
+        "_game_history",
+        "_current_state",
+    )
+
     def __init__(
             self,
             initial_state: BoardState,
@@ -32,7 +44,7 @@ class Game:
         self._timer_white: float = time_left_white
         self._timer_black: float = time_left_black
 
-        self.judge: ArrayJudge = ArrayJudge(initial_state)
+        self.judge: BitboardJudge = BitboardJudge(initial_state)
 
         self._game_history: list[BoardState] = [initial_state]
 
@@ -55,7 +67,7 @@ class Game:
     def submit_move(self, move: Move):
         if self._current_state != -1:
             self._game_history = self._game_history[0:self._current_state + 1]
-            self.judge = ArrayJudge(self._game_history[-1])
+            self.judge = BitboardJudge(self._game_history[-1])
         try:
             self.judge.submit_move(move=move)
         except (IllegalMoveError, GameOverError):
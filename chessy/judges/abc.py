@@ -14,9 +14,24 @@ import numpy as np
 from ..board_representation import BoardState, Move, Moves, COLOR, PIECE
 
 
+# Maximum number of positions kept in the analysis cache of each judge (see `Judge.cached_analysis`)
+MAX_ANALYSIS_CACHE_SIZE = 1 << 14
+
+
 class Judge(ABC):
     """ """
 
+    __slots__ = ()
+
+    # Check status and valid moves of recently analyzed positions, keyed by `position_key`;
+    # each judge class has its own cache, shared between all its instances.
+    _analysis_cache: dict[tuple, tuple[bool, Moves]]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._analysis_cache = {}
+        return
+
     @abstractmethod
     def __init__(self, initial_state: BoardState):
         """
@@ -24,6 +39,61 @@ class Judge(ABC):
         """
         ...
 
+    @property
+    def zobrist(self) -> int:
+        """
+        Zobrist hash of the current position (see `chessy.zobrist`), stored in `_zobrist`.
+
+        It is computed from the board when the judge is instantiated, since the `zobrist` of the
+        initial state may be missing or stale (e.g. when the board has been modified after the
+        state was created), and then updated incrementally after each move.
+        """
+        return self._zobrist
+
+    @property
+    @abstractmethod
+    def position_key(self) -> tuple:
+        """
+        A hashable key identifying the current position, i.e. all data that determine
+        the valid moves of the current player. Unlike the Zobrist hash, distinct positions
+        never share a key, so it is used for caching analysis results.
+        """
+        ...
+
+    @abstractmethod
+    def analyze_moves(self) -> tuple[bool, Moves]:
+        """
+        Whether the current player is in check, and all their valid moves, computed from scratch.
+        """
+        ...
+
+    def cached_analysis(self) -> tuple[bool, Moves]:
+        """
+        Check status and valid moves of the current position, looked up in the judge's
+        analysis cache, so that positions visited repeatedly (e.g. via transpositions in a search,
+        or when re-instantiating a judge after undoing moves) are only analyzed once.
+
+        The cache is ordered from least to most recently used (dicts preserve insertion order,
+        and each hit re-inserts the entry); once it holds `MAX_ANALYSIS_CACHE_SIZE` positions,
+        the least recently used entry is evicted for each new one. The cached `Moves` must
+        never be mutated.
+
+        Returns
+        -------
+        tuple[bool, Moves]
+            Whether the current player is in check, and all their valid moves.
+        """
+        cache = self._analysis_cache
+        key = self.position_key
+        try:
+            analysis = cache.pop(key)
+        except KeyError:
+            analysis = self.analyze_moves()
+            if len(cache) >= MAX_ANALYSIS_CACHE_SIZE:
+                del cache[next(iter(cache))]  # Evict the least recently used entry
+        cache[key] = analysis
+        return analysis
+
     @property
     @abstractmethod
     def current_state(self) -> BoardState:
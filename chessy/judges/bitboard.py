@@ -1,20 +1,524 @@
-from typing import Optional, Sequence, NamedTuple, Any
+"""
+Bitboard-based judge and move-generator.
+"""
 
+# Standard library
+from __future__ import annotations
+from typing import NoReturn, Iterator
+
+# 3rd party
 import numpy as np
 
-from .abc import Judge
+# Self
+from .abc import Judge, IllegalMoveError, GameOverError
+from ..board_representation import BoardState, Move, Moves, pack_move
+from ..consts import *
+from ..zobrist import PIECE_SQUARE_KEYS, SIDE_KEY, CASTLING_KEYS, ENPASSANT_KEYS, hash_position
+from ..magics import rook_attacks, bishop_attacks, queen_attacks
+from ..attacks import (
+    KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS_W, PAWN_ATTACKS_B,
+    is_square_attacked, moves_result_in_check,
+)
+
+
+# Bitboards are stored as Python integers, with bit `i` corresponding to square `i` (as indexed
+# in `Move`). For values up to 64 bits these are much faster to operate on than NumPy's uint64
+# scalars, which go through NumPy's scalar machinery on every operation.
+# Bitboards with only a single square set, indexed by square index
+SQUARE_BBS = [1 << sq for sq in range(64)]
+EMPTY_BB = 0
+# Piece-ID corresponding to each of the 12 piece bitboards:
+# white pawn, knight, bishop, rook, queen, king, followed by the same for black.
+PIECE_OF_BB_IDX = (1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6)
+# Castling rights lost when a piece moves from or to each square, i.e. when a king or a rook
+# leaves its initial square, or a rook is captured on its initial square.
+CASTLING_RIGHTS_LOST = [0] * 64
+for _player, _s_king in ((WHITE, E1), (BLACK, E8)):
+    CASTLING_RIGHTS_LOST[_s_king[0] * 8 + _s_king[1]] = CASTLING_RIGHTS_PLAYER[_player]
+    for _side, _s_rook in ROOK_S_INIT[_player].items():
+        CASTLING_RIGHTS_LOST[_s_rook[0] * 8 + _s_rook[1]] = CASTLING_RIGHT[_player][_side]
+
+# Python-int copies of the attack tables in `chessy.attacks`, used for generating move targets
+_KNIGHT_ATTACKS = KNIGHT_ATTACKS.tolist()
+_KING_ATTACKS = KING_ATTACKS.tolist()
+_PAWN_ATTACKS = {WHITE: PAWN_ATTACKS_W.tolist(), BLACK: PAWN_ATTACKS_B.tolist()}
+
+
+def bb_idx(p: int) -> int:
+    """
+    Index of the bitboard of a given piece in the array of piece bitboards.
+
+    Parameters
+    ----------
+    p : int
+        Piece-ID, as defined in `BoardState`.
+
+    Returns
+    -------
+    int
+        Index from 0 to 11; white pieces have indices 0 to 5, and black pieces 6 to 11,
+        each in the order pawn, knight, bishop, rook, queen, king.
+    """
+    return p - 1 if p > 0 else 5 - p
+
+
+def iter_squares(bb: int) -> Iterator[int]:
+    """
+    Generate the indices of all squares that are set in a given bitboard, in ascending order.
+    """
+    while bb:
+        lsb = bb & -bb  # Isolate the least significant set bit
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+class BitboardJudge(Judge):
+    """
+    Judge and move-generator based on a bitboard representation of the board.
+
+    Instead of a single 8x8 array, the position is stored as 12 64-bit bitboards (one for each
+    colored piece type), where bit `i` of each integer is set when the corresponding piece stands
+    on square `i` (see `Move` for how squares are indexed).
+    Queries such as whether a square is attacked thus reduce to a few bitwise operations.
+
+    Attributes
+    ----------
+    _pieces : list[int]
+        Bitboards of white pawns, knights, bishops, rooks, queens and king,
+        followed by the same for black (see `bb_idx`).
+    _occupancy_white : int
+        Bitboard of all squares occupied by white pieces.
+    _occupancy_black : int
+        Bitboard of all squares occupied by black pieces.
+    _occupancy_all : int
+        Bitboard of all occupied squares.
+    """
+
+    __slots__ = (
+        "_pieces",
+        "_occupancy_white",
+        "_occupancy_black",
+        "_occupancy_all",
+        "_castling_rights",
+        "_player",
+        "_fifty_move_count",
+        "_enpassant_file",
+        "_ply_count",
+        "_zobrist",
+        "_is_checkmate",
+        "_is_check",
+        "_is_draw",
+        "_valid_moves",
+    )
+
+    def __init__(self, initial_state: BoardState):
+        self._pieces: list[int] = [EMPTY_BB] * 12
+        for sq, p in enumerate(initial_state.board.reshape(-1).tolist()):
+            if p != NULL:
+                self._pieces[bb_idx(p)] |= SQUARE_BBS[sq]
+        self._occupancy_white: int = EMPTY_BB
+        self._occupancy_black: int = EMPTY_BB
+        self._occupancy_all: int = EMPTY_BB
+        self.update_occupancy()
+
+        self._castling_rights: int = initial_state.castling_rights
+        self._player: int = initial_state.player
+        self._fifty_move_count: int = initial_state.fifty_move_count
+        self._enpassant_file: int = initial_state.enpassant_file
+        self._ply_count: int = initial_state.ply_count
+        self._zobrist: int = hash_position(
+            board=initial_state.board,
+            castling_rights=self._castling_rights,
+            player=self._player,
+            enpassant_file=self._enpassant_file,
+        )
+
+        self._is_checkmate: bool = False
+        self._is_check: bool = False
+        self._is_draw: bool = False
+        self._valid_moves: Moves = None
+        # If the BoardState is faulty, so that the opponent has been checkmated already in current
+        # player's last move, now the opponent's king would be under attack by current player.
+        if self.square_is_attacked_by(sq=self.king_square(p=self.opponent), p=self.player):
+            raise GameOverError(code=1)
+        self.analyze_state()
+        return
+
+    @property
+    def current_state(self) -> BoardState:
+        """
+        Current board-state as a `BoardState` object.
+        """
+        board = [0] * 64
+        for idx, bb in enumerate(self._pieces):
+            for sq in iter_squares(bb):
+                board[sq] = PIECE_OF_BB_IDX[idx]
+        return BoardState(
+            board=np.array(board, dtype=np.int8).reshape(8, 8),
+            castling_rights=self._castling_rights,
+            player=self.player,
+            enpassant_file=self._enpassant_file,
+            fifty_move_count=self._fifty_move_count,
+            ply_count=self._ply_count,
+            zobrist=self._zobrist,
+        )
+
+    @property
+    def position_key(self) -> tuple:
+        """
+        Piece bitboards, castling rights, current player and en passant file.
+        """
+        return (*self._pieces, self._castling_rights, self._player, self._enpassant_file)
+
+    @property
+    def valid_moves(self) -> Moves:
+        """
+        All valid moves available to the current player in the current state.
+        """
+        return self._valid_moves.copy()
+
+    @property
+    def is_checkmate(self) -> bool:
+        """
+        Whether the current player is checkmated in the current state.
+        """
+        return self._is_checkmate
+
+    @property
+    def is_draw(self) -> bool:
+        """
+        Whether the current state is a draw.
+        """
+        return self._is_draw
+
+    @property
+    def is_check(self) -> bool:
+        """
+        Whether the current player is in check.
+        """
+        return self._is_check
+
+    @property
+    def player(self) -> int:
+        """
+        ID of the current player.
+        """
+        return self._player
+
+    @property
+    def opponent(self) -> int:
+        """
+        ID of the current player's opponent.
+        """
+        return self.player * -1
+
+    @property
+    def move_is_promotion(self) -> bool:
+        return
+
+    def submit_move(self, move: Move) -> NoReturn:
+        if self.is_checkmate:
+            raise GameOverError(code=-1)
+        if self.is_draw:
+            raise GameOverError(code=0)
+        # Squares of a `Move` always lie inside the board, so codes 0 and 3 cannot occur.
+        sq0 = move.sq0
+        if self.square_is_empty(sq=sq0):
+            raise IllegalMoveError(code=1)
+        if not self.square_belongs_to_player(sq=sq0):
+            raise IllegalMoveError(code=2, player=self.player)
+        if sq0 == move.sq1:
+            raise IllegalMoveError(code=4)
+        if not self._valid_moves.has_move(move):
+            if self.is_check:
+                raise IllegalMoveError(code=6)
+            raise IllegalMoveError(code=7)
+        self.apply_move(move=move)
+        return
+
+    def apply_move(self, move: Move) -> None:
+        player = self.player
+        sq0, sq1 = move.sq0, move.sq1
+        piece = self.at(sq=sq0)
+        captured_piece = self.at(sq=sq1)
+        # XOR out the features of the current position from the hash; those of the new position
+        # are XORed in below.
+        zobrist = self._zobrist ^ SIDE_KEY ^ PIECE_SQUARE_KEYS[piece + 6][sq0]
+        zobrist ^= CASTLING_KEYS[self._castling_rights] ^ ENPASSANT_KEYS[self._enpassant_file]
+        self._fifty_move_count += 1
+        if captured_piece != NULL:
+            self._fifty_move_count = 0
+            self._pieces[bb_idx(captured_piece)] &= ~SQUARE_BBS[sq1]
+            zobrist ^= PIECE_SQUARE_KEYS[captured_piece + 6][sq1]
+        # Moving the king or a rook from, or capturing a rook on, its initial square
+        # removes the corresponding castling rights
+        self._castling_rights &= ~(CASTLING_RIGHTS_LOST[sq0] | CASTLING_RIGHTS_LOST[sq1])
+        self._pieces[bb_idx(piece)] &= ~SQUARE_BBS[sq0]
+        piece_at_end_square = piece
+        moving_piece_type = abs(piece)
+        if moving_piece_type == PAWN:
+            # Handle promotions and en passant
+            self._fifty_move_count = 0
+            if move.pp != NULL:
+                piece_at_end_square = player * abs(move.pp)
+            if sq1 % 8 != sq0 % 8 and captured_piece == NULL:
+                sq_captured = sq1 - 8 * player
+                self._pieces[bb_idx(-player * PAWN)] &= ~SQUARE_BBS[sq_captured]
+                zobrist ^= PIECE_SQUARE_KEYS[-player * PAWN + 6][sq_captured]
+            self._enpassant_file = sq1 % 8 if abs(sq1 - sq0) == 16 else -1
+        else:
+            self._enpassant_file = -1
+            # Apply castling
+            if moving_piece_type == KING and abs(sq1 - sq0) == 2:
+                side = sq1 - sq0
+                rook_s0, rook_s1 = ROOK_S_INIT[player][side], ROOK_S_END[player][side]
+                rook_sq0, rook_sq1 = rook_s0[0] * 8 + rook_s0[1], rook_s1[0] * 8 + rook_s1[1]
+                self._pieces[bb_idx(player * ROOK)] ^= SQUARE_BBS[rook_sq0] | SQUARE_BBS[rook_sq1]
+                rook_keys = PIECE_SQUARE_KEYS[player * ROOK + 6]
+                zobrist ^= rook_keys[rook_sq0] ^ rook_keys[rook_sq1]
+        self._pieces[bb_idx(piece_at_end_square)] |= SQUARE_BBS[sq1]
+        zobrist ^= PIECE_SQUARE_KEYS[piece_at_end_square + 6][sq1]
+        zobrist ^= CASTLING_KEYS[self._castling_rights] ^ ENPASSANT_KEYS[self._enpassant_file]
+        self._zobrist = zobrist
+        self.update_occupancy()
+        self._ply_count += 1
+        self._is_check = False
+        self._player *= -1
+        self.analyze_state()
+        return
+
+    def analyze_state(self):
+        if self._fifty_move_count == 100:
+            self._is_draw = True
+            self._valid_moves = Moves.empty()
+            return
+        self._is_check, self._valid_moves = self.cached_analysis()
+        if self._valid_moves.is_empty:
+            if self._is_check:
+                self._is_checkmate = True
+            else:
+                self._is_draw = True
+        return
+
+    def analyze_moves(self) -> tuple[bool, Moves]:
+        # Castling-move generation depends on the check status, so it is set first.
+        self._is_check = self.square_is_attacked_by(
+            sq=self.king_square(p=self.player), p=self.opponent
+        )
+        return self._is_check, self.generate_valid_moves()
+
+    def generate_valid_moves(self) -> Moves:
+        """
+        Generate all the valid moves for the current player in the current state.
+
+        Returns
+        -------
+        Moves
+            Valid moves; empty when the current player is either checkmated or stalemated.
+        """
+        player = self.player
+        own_occupancy = self.occupancy_of(p=player)
+        # Collect all pseudo-legal moves, then filter those leaving the king in check at once
+        candidates = self.generate_pawn_candidates()
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            piece = player * piece_type
+            for sq0 in iter_squares(self._pieces[bb_idx(piece)]):
+                sq1s = self.attacks_of_piece(sq=sq0, p=piece) & ~own_occupancy
+                candidates.extend((sq0, sq1, piece) for sq1 in iter_squares(sq1s))
+        moves = []
+        if candidates:
+            sq0s, sq1s, ps = np.array(candidates, dtype=np.int64).T
+            mask_check = self.moves_result_in_own_check(sq0s=sq0s, sq1s=sq1s, ps=ps)
+            for (sq0, sq1, piece), results_in_check in zip(candidates, mask_check):
+                if results_in_check:
+                    continue
+                if abs(piece) == PAWN and sq1 // 8 == RANK_PROMOTION[player]:
+                    moves.extend(
+                        (sq0, sq1, piece, player * pp) for pp in (KNIGHT, BISHOP, ROOK, QUEEN)
+                    )
+                else:
+                    moves.append((sq0, sq1, piece, NULL))
+        moves.extend(self.generate_castling_moves())
+        if not moves:
+            return Moves.empty()
+        sq0s, sq1s, ps, pps = np.array(moves, dtype=np.int32).T
+        return Moves(
+            s0s=np.stack(np.divmod(sq0s, 8), axis=-1).astype(np.int8),
+            s1s=np.stack(np.divmod(sq1s, 8), axis=-1).astype(np.int8),
+            ps=ps.astype(np.int8),
+            pps=pps.astype(np.int8),
+            packed=pack_move(sq0=sq0s, sq1=sq1s, p=ps, pp=pps),
+        )
+
+    def generate_pawn_candidates(self) -> list[tuple[int, int, int]]:
+        """
+        Generate all pseudo-legal pawn moves (pushes, captures and en passant) for the current
+        player, i.e. regardless of whether they leave the king in check.
+
+        Returns
+        -------
+        list[tuple[int, int, int]]
+            Start-square index, end-square index and moving piece of each move.
+        """
+        player = self.player
+        piece = player * PAWN
+        step = 8 * player  # Change in square index when moving one rank forward
+        opp_occupancy = self.occupancy_of(p=self.opponent)
+        if self._enpassant_file != -1:
+            opp_occupancy |= SQUARE_BBS[RANK_ENPASSANT_END[player] * 8 + self._enpassant_file]
+        pawn_attacks = _PAWN_ATTACKS[player]
+        candidates = []
+        for sq0 in iter_squares(self._pieces[bb_idx(piece)]):
+            sq1 = sq0 + step
+            if self.square_is_empty(sq=sq1):
+                candidates.append((sq0, sq1, piece))
+                sq1_double = sq1 + step
+                if sq0 // 8 == RANK_PAWN[player] and self.square_is_empty(sq=sq1_double):
+                    candidates.append((sq0, sq1_double, piece))
+            candidates.extend(
+                (sq0, sq1, piece) for sq1 in iter_squares(pawn_attacks[sq0] & opp_occupancy)
+            )
+        return candidates
+
+    def generate_castling_moves(self) -> list[tuple[int, int, int, int]]:
+        """
+        Generate all valid castling moves for the current player.
+
+        Returns
+        -------
+        list[tuple[int, int, int, int]]
+            Start-square index, end-square index, moving piece and promoted piece of each move.
+        """
+        player = self.player
+        if self.is_check:
+            return []
+        king = player * KING
+        sq_king = self.king_square(p=player)
+        ss_empty = CASTLING_SS_EMPTY[player]
+        ss_check = CASTLING_SS_CHECK[player]
+        moves = []
+        # Squares in `ss_empty` and `ss_check` are ordered queenside first, then kingside.
+        for side, ss_empty_side, ss_check_side in (
+            (QUEENSIDE, ss_empty[:3], ss_check[:2]), (KINGSIDE, ss_empty[3:], ss_check[2:])
+        ):
+            if not self._castling_rights & CASTLING_RIGHT[player][side]:
+                continue
+            if not all(self.square_is_empty(sq=s[0] * 8 + s[1]) for s in ss_empty_side):
+                continue
+            sq1s = ss_check_side[:, 0].astype(np.int64) * 8 + ss_check_side[:, 1]
+            if np.any(
+                self.moves_result_in_own_check(
+                    sq0s=np.full(2, sq_king), sq1s=sq1s, ps=np.full(2, king, dtype=np.int64)
+                )
+            ):
+                continue
+            moves.append((sq_king, sq_king + side, king, NULL))
+        return moves
+
+    def moves_result_in_own_check(
+        self, sq0s: np.ndarray, sq1s: np.ndarray, ps: np.ndarray
+    ) -> np.ndarray:
+        """
+        Whether moving given pieces of the current player from given start-squares to
+        end-squares leaves the current player's king under attack.
+
+        Parameters
+        ----------
+        sq0s : numpy.ndarray(shape=(n, ), dtype=numpy.int64)
+            Indices of the start-squares.
+        sq1s : numpy.ndarray(shape=(n, ), dtype=numpy.int64)
+            Indices of the end-squares.
+        ps : numpy.ndarray(shape=(n, ), dtype=numpy.int64)
+            Piece-IDs of the moving pieces.
+
+        Returns
+        -------
+        numpy.ndarray(shape=(n, ), dtype=numpy.bool_)
+        """
+        return moves_result_in_check(
+            np.array(self._pieces, dtype=np.uint64),
+            self.king_square(p=self.player),
+            int(self.player),
+            sq0s,
+            sq1s,
+            ps,
+        )
+
+    def square_is_attacked_by(self, sq: int, p: int) -> bool:
+        """
+        Whether a given square is attacked by any piece of a given player, in the current state.
+        """
+        idx = bb_idx(p * PAWN)
+        return is_square_attacked(
+            np.uint64(self._occupancy_all),
+            np.array(self._pieces[idx:idx + 6], dtype=np.uint64),
+            int(sq),
+            int(p),
+        )
+
+    def attacks_of_piece(self, sq: int, p: int) -> int:
+        """
+        Bitboard of squares attacked by a non-pawn piece on a given square, in the current state.
+        """
+        piece_type = abs(p)
+        if piece_type == KNIGHT:
+            return _KNIGHT_ATTACKS[sq]
+        if piece_type == KING:
+            return _KING_ATTACKS[sq]
+        if piece_type == ROOK:
+            return rook_attacks(sq, self._occupancy_all)
+        if piece_type == BISHOP:
+            return bishop_attacks(sq, self._occupancy_all)
+        return queen_attacks(sq, self._occupancy_all)
+
+    def update_occupancy(self) -> None:
+        """
+        Recalculate the cached occupancy bitboards from the piece bitboards.
+        """
+        p = self._pieces
+        self._occupancy_white = p[0] | p[1] | p[2] | p[3] | p[4] | p[5]
+        self._occupancy_black = p[6] | p[7] | p[8] | p[9] | p[10] | p[11]
+        self._occupancy_all = self._occupancy_white | self._occupancy_black
+        return
+
+    def occupancy_of(self, p: int) -> int:
+        """
+        Bitboard of all squares occupied by a given player's pieces.
+        """
+        return self._occupancy_white if p == WHITE else self._occupancy_black
+
+    def king_square(self, p: int) -> int:
+        """
+        Index of the square of a given player's king.
+        """
+        king_bb = self._pieces[bb_idx(p * KING)]
+        return (king_bb & -king_bb).bit_length() - 1
+
+    def at(self, sq: int) -> int:
+        """
+        Piece-ID of the piece on a given square (0 if empty), as defined in `BoardState`.
+        """
+        bb_sq = SQUARE_BBS[sq]
+        if self._occupancy_all & bb_sq:
+            for idx, bb in enumerate(self._pieces):
+                if bb & bb_sq:
+                    return PIECE_OF_BB_IDX[idx]
+        return 0
 
+    def square_is_empty(self, sq: int) -> bool:
+        """
+        Whether a given square is empty.
+        """
+        return not self._occupancy_all & SQUARE_BBS[sq]
 
-class BitChessboard(Judge):
-    @classmethod
-    def load_state(
-        cls,
-        board: Sequence[Sequence[int]],
-        castling_stats: Sequence[Sequence[int]],
-        turn: int,
-        fifty_move_count: int,
-        enpassant_file: int,
-        ply_count: int,
-    ) -> Judge:
+    def square_belongs_to_player(self, sq: int) -> bool:
+        """
+        Whether a given square has a piece on it belonging to the player in turn.
+        """
+        return bool(self.occupancy_of(p=self.player) & SQUARE_BBS[sq])
 
-        bitboards = np.empty(shape=(13,))
+    def square_belongs_to_opponent(self, sq: int) -> bool:
+        """
+        Whether a given square has a piece on it belonging to the opponent.
+        """
+        return bool(self.occupancy_of(p=self.opponent) & SQUARE_BBS[sq])
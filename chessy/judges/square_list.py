@@ -5,7 +5,6 @@ Array-based judge and move-generator.
 # Standard library
 from __future__ import annotations
 from typing import Optional, NoReturn, Union, Tuple
-from copy import deepcopy
 
 # 3rd party
 import numpy as np
@@ -14,6 +13,36 @@ import numpy as np
 from .abc import Judge, IllegalMoveError, GameOverError
 from ..board_representation import BoardState, Move, Moves
 from ..consts import *
+from ..zobrist import PIECE_SQUARE_KEYS, SIDE_KEY, CASTLING_KEYS, ENPASSANT_KEYS, hash_position
+
+
+# Coordinates of the squares a knight can jump to from each square of the board,
+# indexed by the rank and file of the square.
+KNIGHT_SQUARES = [
+    [
+        np.array(
+            [s for s in (np.array([r, c]) + MOVE_DIRECTIONS[KNIGHT]) if np.all((s > -1) & (s < 8))],
+            dtype=np.int8,
+        )
+        for c in range(8)
+    ]
+    for r in range(8)
+]
+# Flat indices (rank index * 8 + file index) of the squares along each ray starting from each
+# square, nearest first, indexed by the flat index of the square and the direction of the ray
+# as a (rank, file) tuple; rays starting at the edge of the board towards the outside are empty.
+RAY_SQUARES = [
+    {
+        (dr, dc): [
+            (r + k * dr) * 8 + c + k * dc
+            for k in range(1, 8)
+            if 0 <= r + k * dr < 8 and 0 <= c + k * dc < 8
+        ]
+        for dr, dc in DIRECTIONS.tolist()
+    }
+    for r in range(8)
+    for c in range(8)
+]
 
 
 class ArrayJudge(Judge):
@@ -24,18 +53,49 @@ class ArrayJudge(Judge):
 
     _board : numpy.ndarray
 
-    _castling_rights : dict[int, numpy.ndarray]
-        First element is a dummy element, so that `self._can_castle[self._turn]`
-        gives the castling list of current player
+    _castling_rights : int
+        Castling rights of both players as bit-flags, as in `BoardState.castling_rights`.
+
+    _king_squares : dict[int, numpy.ndarray]
+        Coordinates of the king of each player (keys: 1 for white and -1 for black),
+        updated whenever a king moves, so that king squares are not searched on the board.
     """
 
+    __slots__ = (
+        "_board",
+        "_castling_rights",
+        "_player",
+        "_fifty_move_count",
+        "_enpassant_file",
+        "_ply_count",
+        "_zobrist",
+        "_king_squares",
+        "_empty_array_squares",
+        "_empty_move",
+        "_is_checkmate",
+        "_is_check",
+        "_is_draw",
+        "_valid_moves",
+    )
+
     def __init__(self, initial_state: BoardState):
         self._board: np.ndarray = initial_state.board.copy()
-        self._castling_rights: dict = initial_state.castling_rights.copy()
-        self._player: np.int8 = initial_state.player
-        self._fifty_move_count: np.int8 = initial_state.fifty_move_count
-        self._enpassant_file: np.int8 = initial_state.enpassant_file
-        self._ply_count: np.int16 = initial_state.ply_count
+        self._castling_rights: int = initial_state.castling_rights
+        self._player: int = initial_state.player
+        self._fifty_move_count: int = initial_state.fifty_move_count
+        self._enpassant_file: int = initial_state.enpassant_file
+        self._ply_count: int = initial_state.ply_count
+        self._zobrist: int = hash_position(
+            board=self._board,
+            castling_rights=self._castling_rights,
+            player=self._player,
+            enpassant_file=self._enpassant_file,
+        )
+
+        self._king_squares: dict[int, np.ndarray] = {
+            WHITE: self.squares_of_piece(p=WHITE * KING)[0],
+            BLACK: self.squares_of_piece(p=BLACK * KING)[0],
+        }
 
         self._empty_array_squares = np.array([], dtype=np.int8).reshape(0, 2)
         self._empty_move: tuple = (self._empty_array_squares, self._empty_array_squares)
@@ -47,7 +107,7 @@ class ArrayJudge(Judge):
         self.analyze_state()
         # If the BoardState is faulty, so that the opponent has been checkmated already in current
         # player's last move, now capturing opponent's king would be in current player's moves.
-        opp_king_pos = self.squares_of_piece(p=self.opponent * KING)
+        opp_king_pos = self._king_squares[self.opponent]
         move_captures_king = np.all(self._valid_moves.s1s == opp_king_pos, axis=1)
         if np.any(move_captures_king):
             raise GameOverError(code=1)
@@ -60,19 +120,27 @@ class ArrayJudge(Judge):
         """
         return BoardState(
             board=self._board.copy(),
-            castling_rights=self._castling_rights.copy(),
+            castling_rights=self._castling_rights,
             player=self.player,
             enpassant_file=self._enpassant_file,
             fifty_move_count=self._fifty_move_count,
             ply_count=self._ply_count,
+            zobrist=self._zobrist,
         )
 
+    @property
+    def position_key(self) -> tuple:
+        """
+        Board (as bytes), castling rights, current player and en passant file.
+        """
+        return self._board.tobytes(), self._castling_rights, self._player, self._enpassant_file
+
     @property
     def valid_moves(self) -> Moves:
         """
         All valid moves available to the current player in the current state.
         """
-        return deepcopy(self._valid_moves)
+        return self._valid_moves.copy()
 
     @property
     def is_checkmate(self) -> bool:
@@ -96,14 +164,14 @@ class ArrayJudge(Judge):
         return self._is_check
 
     @property
-    def player(self) -> np.int8:
+    def player(self) -> int:
         """
         ID of the current player.
         """
         return self._player
 
     @property
-    def opponent(self) -> np.int8:
+    def opponent(self) -> int:
         """
         ID of the current player's opponent.
         """
@@ -118,7 +186,7 @@ class ArrayJudge(Judge):
 
     @property
     def squares_of_player(self):
-        return np.argwhere(np.sign(self._board) == self.player)
+        return np.argwhere(self._board * self.player > 0)
 
     @property
     def move_is_promotion(self) -> bool:
@@ -130,28 +198,26 @@ class ArrayJudge(Judge):
 
     @property
     def pos_king(self):
-        return self.squares_of_piece(self.king)[0]
+        return self._king_squares[self.player]
 
     @property
     def king(self):
         return self.player * KING
 
     def submit_move(self, move: Move) -> NoReturn:
-        move_vect = move.s1 - move.s0
-        piece = self.pieces_in_squares(ss=move.s0)
         if self.is_checkmate:
             raise GameOverError(code=-1)
         if self.is_draw:
             raise GameOverError(code=0)
-        if not self.squares_are_inside_board(ss=move.s0):
-            raise IllegalMoveError(code=0)
+        # Squares of a `Move` always lie inside the board, so codes 0 and 3 cannot occur.
+        s0, s1 = move.s0, move.s1
+        move_vect = s1 - s0
+        piece = self.pieces_in_squares(ss=s0)
         if not piece:
             raise IllegalMoveError(code=1)
-        if not self.squares_belong_to_player(ss=move.s0):
+        if not self.squares_belong_to_player(ss=s0):
             raise IllegalMoveError(code=2, player=self.player)
-        if not self.squares_are_inside_board(ss=move.s1):
-            raise IllegalMoveError(code=3)
-        if np.all(move.s0 == move.s1):
+        if move.sq0 == move.sq1:
             raise IllegalMoveError(code=4)
         if not self.move_principally_legal_for_piece(p=piece, move_vect=move_vect):
             raise IllegalMoveError(code=5, piece_type=self.piece_types(piece), move_vect=move_vect)
@@ -163,12 +229,19 @@ class ArrayJudge(Judge):
         return
 
     def apply_move(self, move: Move) -> None:
-        piece_at_end_square = self.pieces_in_squares(ss=move.s0)
+        s0, s1 = move.s0, move.s1
+        sq0, sq1 = move.sq0, move.sq1
+        piece_at_end_square = self.pieces_in_squares(ss=s0)
         moving_piece_type = self.piece_types(piece_at_end_square)
-        captured_piece = self.pieces_in_squares(ss=move.s1)
+        captured_piece = self.pieces_in_squares(ss=s1)
+        # XOR out the features of the current position from the hash (the key of an empty square
+        # is zero); those of the new position are XORed in below.
+        zobrist = self._zobrist ^ SIDE_KEY ^ PIECE_SQUARE_KEYS[piece_at_end_square + 6][sq0]
+        zobrist ^= PIECE_SQUARE_KEYS[captured_piece + 6][sq1]
+        zobrist ^= CASTLING_KEYS[self._castling_rights] ^ ENPASSANT_KEYS[self._enpassant_file]
         if captured_piece != NULL:
             self._fifty_move_count = -1
-        move_vec = move.s1 - move.s0
+        move_vec = s1 - s0
         move_vec_mag = np.abs(move_vec)
         if moving_piece_type == PAWN:
             # Handle promotions and en passant
@@ -176,24 +249,32 @@ class ArrayJudge(Judge):
             if move.pp != NULL:
                 piece_at_end_square = move.pp
             if np.all(move_vec_mag == [1, 1]) and captured_piece == 0:
-                self._board[move.s1[0] - self.player, move.s1[1]] = 0
-            self._enpassant_file = move.s1[1] if move_vec_mag[0] == 2 else -1
+                self._board[s1[0] - self.player, s1[1]] = 0
+                zobrist ^= PIECE_SQUARE_KEYS[-self.player * PAWN + 6][sq1 - 8 * self.player]
+            self._enpassant_file = int(s1[1]) if move_vec_mag[0] == 2 else -1
         else:
             self._enpassant_file = -1
             # Apply castling and/or modify castling rights
             if moving_piece_type == KING:
-                self._castling_rights[self.player] = dict.fromkeys(
-                    self._castling_rights[self.player], False
-                )
+                self._king_squares[self.player] = s1
+                self._castling_rights &= ~CASTLING_RIGHTS_PLAYER[self.player]
                 if move_vec_mag[1] == 2:
-                    self._board[ROOK_S_INIT[self.player][move_vec[1]]] = 0
-                    self._board[ROOK_S_END[self.player][move_vec[1]]] = self.player * ROOK
+                    rook_s0 = ROOK_S_INIT[self.player][move_vec[1]]
+                    rook_s1 = ROOK_S_END[self.player][move_vec[1]]
+                    self._board[rook_s0] = 0
+                    self._board[rook_s1] = self.player * ROOK
+                    rook_keys = PIECE_SQUARE_KEYS[self.player * ROOK + 6]
+                    zobrist ^= rook_keys[rook_s0[0] * 8 + rook_s0[1]]
+                    zobrist ^= rook_keys[rook_s1[0] * 8 + rook_s1[1]]
             elif moving_piece_type == ROOK:
                 for side, pos in ROOK_S_INIT[self.player].items():
-                    if np.all(move.s0 == pos):
-                        self._castling_rights[self.player][side] = False
-        self._board[tuple(move.s1)] = piece_at_end_square
-        self._board[tuple(move.s0)] = 0
+                    if np.all(s0 == pos):
+                        self._castling_rights &= ~CASTLING_RIGHT[self.player][side]
+        self._board[tuple(s1)] = piece_at_end_square
+        self._board[tuple(s0)] = 0
+        zobrist ^= PIECE_SQUARE_KEYS[piece_at_end_square + 6][sq1]
+        zobrist ^= CASTLING_KEYS[self._castling_rights] ^ ENPASSANT_KEYS[self._enpassant_file]
+        self._zobrist = zobrist
         self._fifty_move_count += 1
         self._ply_count += 1
         self._is_check = False
@@ -204,20 +285,24 @@ class ArrayJudge(Judge):
     def analyze_state(self):
         if self._fifty_move_count == 100 or self.is_dead_position:
             self._is_draw = True
+            self._valid_moves = Moves.empty()
         else:
-            checking_squares = self.squares_leading_to()
-            if checking_squares.size != 0:
-                self._is_check = True
-                valid_moves = self.generate_valid_moves_checked(ss_checking_king=checking_squares)
-                if valid_moves.is_empty:
+            self._is_check, valid_moves = self.cached_analysis()
+            if valid_moves.is_empty:
+                if self._is_check:
                     self._is_checkmate = True
-            else:
-                valid_moves = self.generate_valid_moves_unchecked()
-                if valid_moves.is_empty:
+                else:
                     self._is_draw = True
             self._valid_moves = valid_moves
         return
 
+    def analyze_moves(self) -> tuple[bool, Moves]:
+        checking_squares = self.squares_leading_to()
+        if checking_squares.size != 0:
+            self._is_check = True
+            return True, self.generate_valid_moves_checked(ss_checking_king=checking_squares)
+        return False, self.generate_valid_moves_unchecked()
+
     def generate_valid_moves_unchecked(self) -> Moves:
         """
         Generate all the valid moves for the current player in the current state,
@@ -451,7 +536,9 @@ class ArrayJudge(Judge):
         s1s_inboard = s1s_normal[ArrayJudge.squares_are_inside_board(ss=s1s_normal)]
         s1s_vacant = s1s_inboard[~self.squares_belong_to_player(ss=s1s_inboard)]
         s1s_final = s1s_vacant[self.king_wont_be_attacked(ss=s1s_vacant)]
-        player_castling_rights = np.array(list(self._castling_rights[self.player].values()))
+        player_castling_rights = np.array(
+            [self.castling_right(side=QUEENSIDE), self.castling_right(side=KINGSIDE)]
+        )
         if not self.is_check and np.any(player_castling_rights):
             vacant = self.squares_are_empty(ss=CASTLING_SS_EMPTY[self.player])
             mask_vacant = [np.all(vacant[:3]), np.all(vacant[3:])]
@@ -497,12 +584,10 @@ class ArrayJudge(Judge):
             Coordinates of the 'checking' squares.
         """
         p = self.opponent if p is None else p
-        s = self.squares_of_piece(-p * KING)[0] if s is None else s
+        s = self._king_squares[-p] if s is None else s
         # 1. CHECK FOR KNIGHT ATTACKS
-        # Add given start-square to all knight vectors to get all possible attacking positions
-        knight_pos = s + MOVE_DIRECTIONS[KNIGHT]
-        # Take those end squares that are within the board
-        inboards = knight_pos[self.squares_are_inside_board(ss=knight_pos)]
+        # Look up all possible attacking positions within the board
+        inboards = KNIGHT_SQUARES[s[0]][s[1]]
         mask_knight = self.pieces_in_squares(inboards) == p * KNIGHT
         # 2. CHECK FOR STRAIGHT-LINE ATTACKS (queen, bishop, rook, pawn, king)
         # Get nearest neighbor in each direction
@@ -587,23 +672,30 @@ class ArrayJudge(Judge):
         return current_unpin_mask
 
     def neighbor_squares(self, ss, ds):
-        neighbor_squares = np.zeros(shape=ss.shape, dtype=np.int8)
-        next_neighbors_pos = ss + ds
-        not_set = np.ones(ss.size // 2, dtype=np.bool_)
-        while np.any(not_set):
-            mask_inboard = self.squares_are_inside_board(ss=next_neighbors_pos[not_set])
-            curr_mask = not_set.copy()
-            curr_mask[curr_mask] = ~mask_inboard
-            neighbor_squares[curr_mask] = next_neighbors_pos[curr_mask] - ds[curr_mask]
-            not_set[not_set] = mask_inboard
-            inboard_squares = next_neighbors_pos[not_set]
-            mask_occupied = self.pieces_in_squares(ss=inboard_squares) != 0
-            curr_mask = not_set.copy()
-            curr_mask[curr_mask] = mask_occupied
-            neighbor_squares[curr_mask] = inboard_squares[mask_occupied]
-            not_set[not_set] = ~mask_occupied
-            next_neighbors_pos += ds
-        return neighbor_squares
+        """
+        Coordinates of the nearest occupied square from each given square in a given direction,
+        or of the last square inside the board in that direction, if all squares are empty.
+
+        Parameters
+        ----------
+        ss : numpy.ndarray(shape=(n, 2), dtype=numpy.int8)
+            Coordinates of the squares.
+        ds : numpy.ndarray(shape=(n, 2), dtype=numpy.int8)
+            Unit vector of the direction for each square.
+
+        Returns
+        -------
+        numpy.ndarray(shape=(n, 2), dtype=numpy.int8)
+        """
+        board = self._board.reshape(-1).tolist()
+        neighbor_squares = []
+        for (r, c), d in zip(ss.tolist(), ds.tolist()):
+            neighbor_square = r * 8 + c  # Remains the square itself when at the board's edge
+            for neighbor_square in RAY_SQUARES[neighbor_square][tuple(d)]:
+                if board[neighbor_square] != NULL:
+                    break
+            neighbor_squares.append(divmod(neighbor_square, 8))
+        return np.array(neighbor_squares, dtype=np.int8).reshape(-1, 2)
 
     def pawn_move_restriction(self, s0):
         move_dirs = np.array([[1, 0], [1, 1], [1, -1]], dtype=np.int8) * self.player
@@ -623,8 +715,8 @@ class ArrayJudge(Judge):
         can_capture_enpassant = np.all(
             s1 == [RANK_ENPASSANT_END[self.player], self._enpassant_file]
         )
-        can_capture_normal = self.squares_are_inside_board(
-            ss=s1
+        can_capture_normal = self.square_is_inside_board(
+            s=s1
         ) and self.squares_belong_to_opponent(ss=s1)
         return can_capture_normal or can_capture_enpassant
 
@@ -635,9 +727,9 @@ class ArrayJudge(Judge):
         Parameters
         ----------
         side : int
-            +1 for kingside, -1 for queenside.
+            +2 for kingside, -2 for queenside.
         """
-        return self._castling_rights[self.player][side]
+        return bool(self._castling_rights & CASTLING_RIGHT[self.player][side])
 
     def pieces_in_squares(self, ss: np.ndarray) -> Union[np.ndarray, np.int8]:
         """
@@ -680,20 +772,26 @@ class ArrayJudge(Judge):
         """
         Whether a given square has a piece on it belonging to a given player.
         """
-        return np.sign(self.pieces_in_squares(ss=ss)) == p
+        # A piece belongs to the player when the piece-ID and player have the same sign, i.e.
+        # when their product is positive (which also excludes empty squares).
+        if ss.ndim == 1:  # Single square; avoid array operations
+            return int(self._board[ss[0], ss[1]]) * p > 0
+        return self.pieces_in_squares(ss=ss) * p > 0
 
     def squares_are_empty(self, ss: np.ndarray):
+        if ss.ndim == 1:  # Single square; avoid array operations
+            return int(self._board[ss[0], ss[1]]) == 0
         return self.pieces_in_squares(ss=ss) == 0
 
     def pieces_belong_to_player(
         self, ps: Union[np.int8, np.ndarray]
     ) -> Union[np.bool_, np.ndarray]:
-        return np.sign(ps) == self.player
+        return ps * self.player > 0
 
     def pieces_belong_to_opponent(
         self, ps: Union[np.int8, np.ndarray]
     ) -> Union[np.bool_, np.ndarray]:
-        return np.sign(ps) == self.opponent
+        return ps * self.opponent > 0
 
     def mask_ss_non_p_rank(self, ss: np.ndarray) -> np.ndarray:
         """
@@ -800,6 +898,25 @@ class ArrayJudge(Judge):
         is_cardinal = np.abs(move_unit_vect).max(axis=-1) == 1
         return move_vect, move_unit_vect, move_vect_multiplier, is_cardinal
 
+    @staticmethod
+    def square_is_inside_board(s: np.ndarray) -> bool:
+        """
+        Whether a single given square lies inside the board.
+        This is the scalar counterpart of `squares_are_inside_board`, avoiding the overhead
+        of array operations when only one square is to be checked.
+
+        Parameters
+        ----------
+        s : numpy.ndarray(shape=(2,), dtype=numpy.int8)
+            Rank and file coordinates of the square.
+
+        Returns
+        -------
+        bool
+        """
+        rank, file = s
+        return 0 <= rank < 8 and 0 <= file < 8
+
     @staticmethod
     def squares_are_inside_board(ss: np.ndarray) -> np.ndarray:
         """
@@ -844,18 +961,19 @@ class ArrayJudge(Judge):
 
     @staticmethod
     def move_principally_legal_for_piece(p: np.int8, move_vect: np.ndarray) -> bool:
-        move_abs = np.abs(move_vect)
-        move_manhattan_dist = move_abs.sum()
+        rank_vect, file_vect = int(move_vect[0]), int(move_vect[1])
+        rank_dist, file_dist = abs(rank_vect), abs(file_vect)
+        move_manhattan_dist = rank_dist + file_dist
         piece_type = abs(p)
         if piece_type == PAWN:
-            return (move_vect[0] == p and move_abs[1] < 2) or np.all(move_vect == [2 * p, 0])
+            return (rank_vect == p and file_dist < 2) or (rank_vect == 2 * p and file_vect == 0)
         elif piece_type == KNIGHT:
-            return not (move_manhattan_dist != 3 or np.isin(3, move_abs))
+            return rank_dist * file_dist == 2
         elif piece_type == BISHOP:
-            return move_abs[0] == move_abs[1]
+            return rank_dist == file_dist
         elif piece_type == ROOK:
-            return np.isin(0, move_abs)
+            return rank_dist == 0 or file_dist == 0
         elif piece_type == QUEEN:
-            return move_abs[0] == move_abs[1] or np.isin(0, move_abs)
+            return rank_dist == file_dist or rank_dist == 0 or file_dist == 0
         elif piece_type == KING:
-            return move_manhattan_dist == 1 or (move_manhattan_dist == 2 and move_abs[0] != 2)
+            return move_manhattan_dist == 1 or (move_manhattan_dist == 2 and rank_dist != 2)
@@ -0,0 +1,223 @@
+"""
+Magic-bitboard tables for computing the attacks of sliding pieces (rook, bishop and queen).
+
+For each square, the squares that can block a rook (or bishop) on that square form a
+"relevance mask". Multiplying the occupied squares within that mask with a "magic" number,
+and keeping the highest bits of the product, gives a unique index for each blocker
+configuration that leads to a distinct attack set. The attack sets of all blocker
+configurations are precomputed at import time, so that sliding attacks become a table lookup:
+
+    idx = ((occupancy & ROOK_MASKS[sq]) * ROOK_MAGICS[sq]) >> ROOK_SHIFTS[sq]
+    attacks = ROOK_ATTACKS[ROOK_OFFSETS[sq] + idx]
+
+where the multiplication is modulo 2**64. The attack sets of all squares are stored in a single
+flat array, where each square only takes as many entries as it has blocker configurations
+(e.g. 2**12 for a rook in a corner, but 2**10 in the center), and `ROOK_OFFSETS[sq]` is the index
+of the first entry of square `sq`. This keeps the rook table under 1 MB, so that Numba can embed
+it as a constant in compiled code (see `chessy.attacks`). Queen attacks are the union of rook and
+bishop attacks. Squares are indexed as defined in `chessy.board_representation.Move`.
+"""
+
+# Standard library
+from __future__ import annotations
+from typing import Union
+import random
+
+# 3rd party
+import numpy as np
+
+# Self
+from .consts import DIRECTIONS_ORTHO, DIRECTIONS_DIAG
+
+
+_FULL_BB = (1 << 64) - 1
+_DELTAS_ORTHO = DIRECTIONS_ORTHO.tolist()
+_DELTAS_DIAG = DIRECTIONS_DIAG.tolist()
+
+
+def relevance_mask(sq: int, deltas: list) -> int:
+    """
+    Bitboard of the squares whose occupancy affects the attacks of a slider on a given square,
+    i.e. all squares on its rays, excluding the last square of each ray at the board's edge.
+    """
+    r0, c0 = divmod(sq, 8)
+    mask = 0
+    for dr, dc in deltas:
+        r, c = r0 + dr, c0 + dc
+        while 0 <= r + dr < 8 and 0 <= c + dc < 8:
+            mask |= 1 << (r * 8 + c)
+            r, c = r + dr, c + dc
+    return mask
+
+
+def ray_attacks(sq: int, occupancy: int, deltas: list) -> int:
+    """
+    Bitboard of the squares attacked by a slider on a given square, found by scanning along
+    each direction until the first occupied square (which is included).
+    """
+    r0, c0 = divmod(sq, 8)
+    attacks = 0
+    for dr, dc in deltas:
+        r, c = r0 + dr, c0 + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            bb_sq = 1 << (r * 8 + c)
+            attacks |= bb_sq
+            if occupancy & bb_sq:
+                break
+            r, c = r + dr, c + dc
+    return attacks
+
+
+def mask_subsets(mask: int):
+    """
+    Generate all subsets of a given bitboard (starting with the empty one),
+    using the Carry-Rippler trick.
+    """
+    subset = 0
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if subset == 0:
+            return
+
+
+def find_magic(sq: int, deltas: list, seed: Union[int, random.Random] = 0xC4E55) -> int:
+    """
+    Find a magic number for a given square by trial and error, using sparse random candidates.
+
+    This takes tens of seconds for all squares, which is why the magic numbers below are
+    hardcoded; they were generated with:
+        rng = random.Random(0xC4E55); [find_magic(sq, _DELTAS_ORTHO, rng) for sq in range(64)]
+    followed by the same for `_DELTAS_DIAG` with the same `rng`.
+
+    Parameters
+    ----------
+    sq : int
+        Index of the square.
+    deltas : list
+        Directions of the slider.
+    seed : Union[int, random.Random]
+        Seed of the random number generator, or the generator itself.
+
+    Returns
+    -------
+    int
+    """
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+    mask = relevance_mask(sq, deltas)
+    shift = 64 - mask.bit_count()
+    occupancies = list(mask_subsets(mask))
+    attacks = [ray_attacks(sq, occupancy, deltas) for occupancy in occupancies]
+    while True:
+        magic = rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)
+        if ((mask * magic) & 0xFF00000000000000).bit_count() < 6:
+            continue
+        table = {}
+        for occupancy, attack in zip(occupancies, attacks):
+            if table.setdefault(((occupancy * magic) & _FULL_BB) >> shift, attack) != attack:
+                break
+        else:
+            return magic
+
+
+ROOK_MAGICS: np.ndarray = np.array(
+    [
+        0x05800011C004A480, 0x0840400010002000, 0x08802000800A1000, 0x0180080010008104,
+        0x0600200804104200, 0x6200100441020008, 0x4580008021000200, 0x0100008700114022,
+        0x0850801080400660, 0x0800402010004000, 0x8002002200104080, 0x0020040102004081,
+        0x4505004800100500, 0x0004808044000200, 0x4004000102081004, 0x0001000142068900,
+        0x00A030800080400A, 0x4000404010002002, 0x0400808020001000, 0x0188010100100020,
+        0x0400808008000402, 0x0010808002000401, 0x0600440050080102, 0x8001820020810044,
+        0x0080004040002001, 0x0004200880400080, 0x8441100280200080, 0x7008000880801000,
+        0x1004000808008040, 0x0000040080020080, 0x0000920C00011088, 0x0000108200004104,
+        0x080A804006800030, 0x000080220A004100, 0x0C81001441002002, 0x0400100084800800,
+        0x0004008004800800, 0x0002102008010440, 0x856A513004000802, 0x0402104102000094,
+        0x0002400080028022, 0x1102002081020040, 0x0001002000110040, 0x4230080010008080,
+        0x0208080011010004, 0x000C000402008080, 0x0004080241040010, 0x40200040A4020019,
+        0x404D002080004100, 0x0002024025028200, 0x0028220016408200, 0x0200201001003B00,
+        0x00000C0008008180, 0x0400020004008080, 0x8200800100020080, 0x0220004C01208200,
+        0x2500401080220102, 0x1040882100401202, 0x0004411008208202, 0x103D000421100009,
+        0x0182000408201102, 0x0019000804000201, 0x0800008802100104, 0x004022240480410A,
+    ],
+    dtype=np.uint64,
+)
+
+BISHOP_MAGICS: np.ndarray = np.array(
+    [
+        0xA204100082240040, 0x021084080C822002, 0x0004880214400080, 0x0128060440090301,
+        0x1011104024808414, 0x028D242020040200, 0x5101080802082E02, 0x4108404208014000,
+        0x4101411808050048, 0x8000082101040102, 0x00801000A0811040, 0x00008407060000A8,
+        0x4020020210020008, 0x000241012010A020, 0x8010008090082004, 0x8810008682909000,
+        0x04258A4890500200, 0x8010024810408084, 0x1808003000801210, 0x90040002C4008000,
+        0x402A200400A00101, 0x4122003508020214, 0xA002020098040281, 0x0008806200440290,
+        0x2124400010300149, 0x0D08820004044804, 0x409A011002080200, 0x050C004030090040,
+        0x0092040002008210, 0x8080510006100204, 0x70080080CA220100, 0x8442020023288243,
+        0x12C4124100202400, 0x0201212010101409, 0x1020104800040810, 0x4000040401080120,
+        0x0420020400008083, 0x08A00080880B0406, 0x0408009400408217, 0x1008010144331244,
+        0x0002126004212180, 0x0004009825000811, 0x0000202230009800, 0x0A10C02017008800,
+        0x01001C1830100201, 0x2040104840400080, 0x40281011060C0444, 0x4002282100280100,
+        0x1402080208050680, 0x080A004218150004, 0x0002004064100020, 0x0010210084040000,
+        0x00800110A02E0080, 0x40D0A002500A4000, 0x0108020828111060, 0x5448082084004241,
+        0x0081050803042210, 0xD840202202022004, 0x0000503202210410, 0x0010200004420205,
+        0x0000208120852408, 0x0850E2C224080881, 0x102A609490120040, 0x9404082848002840,
+    ],
+    dtype=np.uint64,
+)
+
+
+def _attack_tables(deltas: list, magics: np.ndarray) -> tuple[np.ndarray, ...]:
+    masks = [relevance_mask(sq, deltas) for sq in range(64)]
+    shifts = [64 - mask.bit_count() for mask in masks]
+    offsets = np.cumsum([0] + [1 << (64 - shift) for shift in shifts])
+    attacks = np.zeros(shape=offsets[-1], dtype=np.uint64)
+    for sq in range(64):
+        mask, magic, shift, offset = masks[sq], int(magics[sq]), shifts[sq], offsets[sq]
+        for occupancy in mask_subsets(mask):
+            attacks[offset + (((occupancy * magic) & _FULL_BB) >> shift)] = ray_attacks(
+                sq, occupancy, deltas
+            )
+    return (
+        np.array(masks, dtype=np.uint64),
+        np.array(shifts, dtype=np.uint64),
+        offsets[:-1].astype(np.uint64),
+        attacks,
+    )
+
+
+ROOK_MASKS, ROOK_SHIFTS, ROOK_OFFSETS, ROOK_ATTACKS = _attack_tables(_DELTAS_ORTHO, ROOK_MAGICS)
+BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_OFFSETS, BISHOP_ATTACKS = _attack_tables(
+    _DELTAS_DIAG, BISHOP_MAGICS
+)
+
+# Python-int copies of the tables used by the lookup functions below; indexing a NumPy array
+# returns a NumPy scalar, which is much slower to operate on than an `int`.
+_ROOK_MASKS, _ROOK_MAGICS, _ROOK_SHIFTS, _ROOK_OFFSETS, _ROOK_ATTACKS = (
+    arr.tolist() for arr in (ROOK_MASKS, ROOK_MAGICS, ROOK_SHIFTS, ROOK_OFFSETS, ROOK_ATTACKS)
+)
+_BISHOP_MASKS, _BISHOP_MAGICS, _BISHOP_SHIFTS, _BISHOP_OFFSETS, _BISHOP_ATTACKS = (
+    arr.tolist()
+    for arr in (BISHOP_MASKS, BISHOP_MAGICS, BISHOP_SHIFTS, BISHOP_OFFSETS, BISHOP_ATTACKS)
+)
+
+
+def rook_attacks(sq: int, occupancy: int) -> int:
+    """
+    Bitboard of the squares attacked by a rook on a given square, for a given board occupancy.
+    """
+    idx = ((occupancy & _ROOK_MASKS[sq]) * _ROOK_MAGICS[sq] & _FULL_BB) >> _ROOK_SHIFTS[sq]
+    return _ROOK_ATTACKS[_ROOK_OFFSETS[sq] + idx]
+
+
+def bishop_attacks(sq: int, occupancy: int) -> int:
+    """
+    Bitboard of the squares attacked by a bishop on a given square, for a given board occupancy.
+    """
+    idx = ((occupancy & _BISHOP_MASKS[sq]) * _BISHOP_MAGICS[sq] & _FULL_BB) >> _BISHOP_SHIFTS[sq]
+    return _BISHOP_ATTACKS[_BISHOP_OFFSETS[sq] + idx]
+
+
+def queen_attacks(sq: int, occupancy: int) -> int:
+    """
+    Bitboard of the squares attacked by a queen on a given square, for a given board occupancy.
+    """
+    return rook_attacks(sq, occupancy) | bishop_attacks(sq, occupancy)
@@ -2,7 +2,25 @@ import numpy as np
 
 from ..board_representation import BoardState
 from . import mappings
-from ..consts import WHITE, BLACK, KINGSIDE, QUEENSIDE
+from ..consts import WHITE, BLACK, CR_WK, CR_WQ, CR_BK, CR_BQ
+
+
+# Lookup table mapping the ASCII code of each piece letter to its piece-ID, as defined in
+# `BoardState`; all other characters are mapped to 0.
+FEN_CHAR_TO_PIECE = np.zeros(256, dtype=np.int8)
+for _letter, _piece in mappings.PIECE_LETTERS.items():
+    FEN_CHAR_TO_PIECE[ord(_letter)] = WHITE * _piece
+    FEN_CHAR_TO_PIECE[ord(_letter.lower())] = BLACK * _piece
+# All piece letters, i.e. all characters of the piece data other than digits and separators
+FEN_PIECE_CHARS = "".join(mappings.PIECE_LETTERS) + "".join(mappings.PIECE_LETTERS).lower()
+# Translation tables for the piece data: the first expands each digit (i.e. number of consecutive
+# empty squares) to as many spaces, and the second deletes all characters that can occur in an
+# expanded rank, so that only unknown piece notations remain. Since the record is split on
+# whitespace, the piece data itself can never contain a space.
+FEN_EXPAND_EMPTY_SQUARES = str.maketrans({str(n): " " * n for n in range(10)})
+FEN_DELETE_SQUARE_CHARS = str.maketrans(dict.fromkeys(FEN_PIECE_CHARS + " "))
+# Castling right flag of each letter in the castling availability field
+FEN_CHAR_TO_CASTLING_RIGHT = {"K": CR_WK, "Q": CR_WQ, "k": CR_BK, "q": CR_BQ}
 
 
 def to_boardstate(record: str) -> BoardState:
@@ -41,25 +59,21 @@ def to_boardstate(record: str) -> BoardState:
     ranks = piece_data.split("/")
     if len(ranks) != 8:
         raise ValueError("FEN piece data should contain eight ranks, each separated by a '/'.")
-    ranks.reverse()
     # Within each rank, squares are described from file a to h. Each piece is identified
     # by its algebraic notation, while white pieces are designated using uppercase letters
     # and black pieces use lowercase letters. A set of one or more consecutive empty squares
     # within a rank is denoted by a digit from "1" to "8".
-    board = []
+    # The characters of all squares are collected from a1 to h8, with empty squares as spaces
+    # (which are mapped to 0 by `FEN_CHAR_TO_PIECE`), and converted to piece-IDs at once.
+    ranks = [rank.translate(FEN_EXPAND_EMPTY_SQUARES) for rank in reversed(ranks)]
     for rank in ranks:
-        board.append([])
-        for square in rank:
-            if square.isnumeric():
-                board[-1].extend([0] * int(square))
-            else:
-                color = WHITE if square.isupper() else BLACK
-                try:
-                    board[-1].append(color * mappings.PIECE_LETTERS[square.upper()])
-                except KeyError:
-                    raise ValueError(f"Piece notation {square} is unknown.")
-        if len(board[-1]) != 8:
-            raise ValueError(f"Each rank should describe eight squares; got {len(board[-1])}")
+        unknown = rank.translate(FEN_DELETE_SQUARE_CHARS)
+        if unknown:
+            raise ValueError(f"Piece notation {unknown[0]} is unknown.")
+        if len(rank) != 8:
+            raise ValueError(f"Each rank should describe eight squares; got {len(rank)}")
+    chars = np.frombuffer("".join(ranks).encode("ascii"), dtype=np.uint8)
+    board = FEN_CHAR_TO_PIECE[chars].reshape(8, 8)
     # 2. Active Color
     # "w" means that White is to move; "b" means that Black is to move.
     if active_color == "w":
@@ -72,35 +86,29 @@ def to_boardstate(record: str) -> BoardState:
     # If neither side has the ability to castle, this field uses the character "-".
     # Otherwise, it contains one or more letters:
     # Uppercase for white, lowercase for black; 'k' for kingside, 'q' for queenside.
-    castling_rights = {
-        WHITE: {QUEENSIDE: False, KINGSIDE: False},
-        BLACK: {QUEENSIDE: False, KINGSIDE: False}
-    }
+    castling_rights = 0
     for avail in castling_avail:
-        player_ = WHITE if avail.isupper() else BLACK
         if avail == "-":
             break
-        elif avail.upper() == "K":
-            castling_rights[player_][KINGSIDE] = True
-        elif avail.upper() == "Q":
-            castling_rights[player_][QUEENSIDE] = True
-        else:
+        try:
+            castling_rights |= FEN_CHAR_TO_CASTLING_RIGHT[avail]
+        except KeyError:
             raise ValueError(f"Castling availability field unrecognized; got {avail}")
     # 4. En passant target square
     # over which a pawn has just passed while moving two squares; in algebraic notation.
     # If there is no en passant target square, this field uses the character "-".
     # This is recorded regardless of whether there is a pawn in position to capture en passant.
     if enpassant_square == "-":
-        enpassant_file = np.int8(-1)
+        enpassant_file = -1
     else:
         try:
-            enpassant_file = np.int8(mappings.FILES[enpassant_square[0]])
+            enpassant_file = mappings.FILES[enpassant_square[0]]
         except KeyError:
             raise ValueError(f"En passant target square not recognized; got {enpassant_square}")
     # 5. Halfmove clock
     # number of halfmoves since the last capture or pawn advance, used for the fifty-move rule.
     try:
-        halfmove_clock = np.int8(halfmove_clock)
+        halfmove_clock = int(halfmove_clock)
     except ValueError:
         raise ValueError(f"Halfmove clock must be an integer; got {halfmove_clock}.")
     if 0 <= halfmove_clock <= 100:
@@ -113,7 +121,7 @@ def to_boardstate(record: str) -> BoardState:
     #   Bonsdorff et al., Schach und Zahl. Unterhaltsame Schachmathematik. pp. 11–13,
     # the longest-possible game lasts 5899 moves (i.e. 11798 plies).
     try:
-        fullmove_num = np.int8(fullmove_num)
+        fullmove_num = int(fullmove_num)
     except ValueError:
         raise ValueError(f"Fullmove number must be an integer; got {fullmove_num}.")
     if 1 <= fullmove_num <= 5899:
@@ -121,10 +129,10 @@ def to_boardstate(record: str) -> BoardState:
     else:
         raise ValueError(f"Fullmove number must be between 1 and 5899; got {fullmove_num}.")
     return BoardState(
-        board=np.array(board, dtype=np.int8),
+        board=board,
         castling_rights=castling_rights,
-        player=np.int8(player),
-        enpassant_file=np.int8(enpassant_file),
-        fifty_move_count=np.int8(fifty_move_count),
-        ply_count=np.int16(ply_count),
+        player=player,
+        enpassant_file=enpassant_file,
+        fifty_move_count=fifty_move_count,
+        ply_count=ply_count,
     )
@@ -0,0 +1,73 @@
+"""
+Zobrist hashing of chess positions.
+
+A position is hashed by XORing together one random 64-bit key for each (piece, square) pair
+on the board, plus keys for the castling rights, the en passant file and the player to move
+(the side key is only included when black is to move). Since XOR is its own inverse, the hash
+can be updated incrementally after each move, by XORing out the keys of the old features and
+XORing in those of the new ones, e.g. for a quiet move of piece `p` from `sq0` to `sq1`:
+
+    h ^= PIECE_SQUARE_KEYS[p + 6][sq0] ^ PIECE_SQUARE_KEYS[p + 6][sq1] ^ SIDE_KEY
+
+Squares are indexed as defined in `chessy.board_representation.Move`. All keys are Python
+integers, so that hashes can be updated without going through NumPy's scalar machinery.
+"""
+
+# Standard library
+from __future__ import annotations
+
+# 3rd party
+import numpy as np
+
+# Self
+from .consts import BLACK
+
+
+_rng = np.random.default_rng(0xC0FFEE)
+_max_key = np.iinfo(np.uint64).max
+
+# Keys of each (piece, square) pair, indexed by piece-ID + 6 and square index;
+# the row of empty squares (index 6) is all zeros.
+PIECE_SQUARE_KEYS: list[list[int]] = _rng.integers(
+    0, _max_key, size=(13, 64), dtype=np.uint64, endpoint=True
+).tolist()
+PIECE_SQUARE_KEYS[6] = [0] * 64
+# Key XORed into the hash when black is to move
+SIDE_KEY: int = int(_rng.integers(0, _max_key, dtype=np.uint64, endpoint=True))
+# Keys of each combination of castling rights, indexed by the 4-bit castling-rights flags
+CASTLING_KEYS: list[int] = _rng.integers(
+    0, _max_key, size=16, dtype=np.uint64, endpoint=True
+).tolist()
+# Keys of each en passant file, indexed by file index; index -1 (i.e. no en passant) is zero.
+ENPASSANT_KEYS: list[int] = _rng.integers(
+    0, _max_key, size=9, dtype=np.uint64, endpoint=True
+).tolist()
+ENPASSANT_KEYS[-1] = 0
+
+
+def hash_position(board: np.ndarray, castling_rights: int, player: int, enpassant_file: int) -> int:
+    """
+    Zobrist hash of a position, computed from scratch.
+
+    Parameters
+    ----------
+    board : numpy.ndarray(shape=(8, 8), dtype=numpy.int8)
+        Board, as defined in `BoardState`.
+    castling_rights : int
+        Castling-rights flags, as defined in `BoardState`.
+    player : int
+        Current player to move; +1 is white and -1 is black.
+    enpassant_file : int
+        File index in which an en passant capture is allowed, or -1.
+
+    Returns
+    -------
+    int
+        A 64-bit hash.
+    """
+    zobrist = CASTLING_KEYS[castling_rights] ^ ENPASSANT_KEYS[enpassant_file]
+    if player == BLACK:
+        zobrist ^= SIDE_KEY
+    for sq, p in enumerate(board.reshape(-1).tolist()):
+        zobrist ^= PIECE_SQUARE_KEYS[p + 6][sq]
+    return zobrist
@@ -0,0 +1,51 @@
+"""
+Perft (performance test) of the move generator, i.e. counting all leaf nodes of the game tree
+up to a given depth, compared with the reference counts of a number of standard test positions
+(see https://www.chessprogramming.org/Perft_Results).
+"""
+
+# Standard library
+from __future__ import annotations
+
+# 3rd party
+import pytest
+
+# Self
+from chessy.board_representation import BoardState
+from chessy.judges.bitboard import BitboardJudge
+from chessy.notations import fen
+
+
+PERFT_POSITIONS = [
+    # Starting position
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", [20, 400, 8902]),
+    # Kiwipete: castling, en passant, promotions and pins
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    # En passant and checks along ranks
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812]),
+    # Promotions, including captures
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+]
+
+
+def perft(state: BoardState, depth: int) -> int:
+    """
+    Number of leaf nodes of the game tree from a given state, up to a given depth.
+    """
+    judge = BitboardJudge(state)
+    moves = judge.valid_moves
+    if depth == 1:
+        return len(moves)
+    count = 0
+    for move in moves:
+        judge = BitboardJudge(state)
+        judge.submit_move(move)
+        count += perft(judge.current_state, depth - 1)
+    return count
+
+
+@pytest.mark.parametrize("record, counts", PERFT_POSITIONS)
+def test_perft(record: str, counts: list[int]):
+    state = fen.to_boardstate(record)
+    assert [perft(state, depth) for depth in range(1, len(counts) + 1)] == counts